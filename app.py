@@ -2,7 +2,13 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import uuid
+import time
+import threading
 import snowflake.connector
+from snowflake.connector.errors import NotSupportedError
+from numba import vectorize
+
+snowflake.connector.paramstyle = "qmark"
 
 st.set_page_config(page_title="Rally Racing Manager", page_icon="🏁", layout="centered")
 
@@ -40,6 +46,7 @@ def get_connection():
         c = cnx.cursor()
         c.execute(f"USE DATABASE {db}")
         c.execute(f"USE SCHEMA {sch}")
+        c.execute("ALTER SESSION SET PYTHON_CONNECTOR_QUERY_RESULT_FORMAT = 'ARROW'")
         c.close()
         return cnx
     except Exception as e:
@@ -48,18 +55,50 @@ def get_connection():
         st.stop()
 
 
-def run(sql: str, params=None, fetch: str | None = None):
-    """Выполнить SQL; fetch='all' вернёт DataFrame."""
-    cur = get_connection().cursor()
+def get_cursor():
+    """Курсор текущей сессии; создаётся заново, только если закрыт."""
+    cur = st.session_state.get("_cur")
+    if cur is None or cur.is_closed():
+        cur = get_connection().cursor()
+        st.session_state["_cur"] = cur
+    return cur
+
+def drop_cursor(cur):
+    st.session_state.pop("_cur", None)
+    cur.close()
+
+def run(sql: str, params=None, fetch: str | None = None, num_statements: int | None = None, dtypes=None):
+    """Выполнить SQL; fetch='all' вернёт DataFrame (с типами из dtypes), num_statements — несколько операторов за один запрос."""
+    cur = get_cursor()
     try:
-        cur.execute(sql, params or [])
+        cur.execute(sql, params or [], num_statements=num_statements)
         if fetch == "all":
             cols = [c[0] for c in cur.description] if cur.description else []
-            rows = cur.fetchall()
-            return pd.DataFrame(rows, columns=cols) if cols else pd.DataFrame()
+            if not cols:
+                return pd.DataFrame()
+            try:
+                df = cur.fetch_pandas_all()
+            except NotSupportedError:
+                df = pd.DataFrame(cur.fetchall(), columns=cols)
+            return df.astype(dtypes) if dtypes and not df.empty else df
         return None
-    finally:
-        cur.close()
+    except Exception:
+        drop_cursor(cur)
+        raise
+
+def run_batches(sql: str, params=None):
+    """Выполнить SELECT и отдавать DataFrame порциями по мере прихода Arrow-чанков."""
+    cur = get_cursor()
+    try:
+        cur.execute(sql, params or [])
+        try:
+            yield from cur.fetch_pandas_batches()
+        except NotSupportedError:
+            cols = [c[0] for c in cur.description] if cur.description else []
+            yield pd.DataFrame(cur.fetchall(), columns=cols)
+    except Exception:
+        drop_cursor(cur)
+        raise
 
 def init_schema_if_missing():
     ddls = [
@@ -111,26 +150,147 @@ def init_schema_if_missing():
     for stmt in ddls:
         run(stmt)
 
-def get_teams_df():
-    return run("SELECT TEAM_ID, TEAM_NAME, MEMBERS, BUDGET FROM TEAMS ORDER BY TEAM_NAME", fetch="all")
+# Верхняя граница устаревания для изменений, сделанных в обход приложения;
+# делится поровну между st.cache_data и копией в st.session_state
+# (таблица и словари id к ней лежат в одной записи с одной меткой времени).
+CACHE_TTL_S = 60
+LAYER_TTL_S = CACHE_TTL_S / 2
+
+TEAMS_DTYPES = {"TEAM_ID": "int64", "BUDGET": "float64"}
+CAR_SPEC_DTYPES = {
+    "CAR_ID": "int64",
+    "TOP_SPEED_KMH": "float64",
+    "ACCEL_0_100_S": "float64",
+    "RELIABILITY": "float64",
+    "HANDLING": "float64",
+}
+CARS_DTYPES = {**CAR_SPEC_DTYPES, "WEIGHT_KG": "float64", "TEAM_ID": "Int64"}
 
-def get_cars_df(include_unassigned=True):
-    sql = """
+@st.cache_resource
+def get_versions():
+    """Версии данных (teams_ver / cars_ver), общие для всех сессий процесса."""
+    return threading.Lock(), {}
+
+def data_version(key: str) -> int:
+    return get_versions()[1].get(key, 0)
+
+def bump_version(key: str):
+    """Сбросить кэш чтений во всех сессиях после изменения данных."""
+    lock, versions = get_versions()
+    with lock:
+        versions[key] = versions.get(key, 0) + 1
+
+@st.cache_data(ttl=LAYER_TTL_S)
+def fetch_teams_df(version: int):
+    return run("SELECT TEAM_ID, TEAM_NAME, MEMBERS, BUDGET FROM TEAMS ORDER BY TEAM_NAME", fetch="all",
+               dtypes=TEAMS_DTYPES)
+
+_CARS_SQL_LEFT = """
     SELECT C.CAR_ID, C.CAR_NAME, C.TOP_SPEED_KMH, C.ACCEL_0_100_S, C.RELIABILITY,
            C.HANDLING, C.WEIGHT_KG, C.TEAM_ID, T.TEAM_NAME
       FROM CARS C
       LEFT JOIN TEAMS T ON T.TEAM_ID = C.TEAM_ID
       ORDER BY C.CAR_ID DESC
-    """
-    if not include_unassigned:
-        sql = sql.replace("LEFT JOIN", "JOIN")
-    return run(sql, fetch="all")
+"""
+
+_CARS_SQL_INNER = """
+    SELECT C.CAR_ID, C.CAR_NAME, C.TOP_SPEED_KMH, C.ACCEL_0_100_S, C.RELIABILITY,
+           C.HANDLING, C.WEIGHT_KG, C.TEAM_ID, T.TEAM_NAME
+      FROM CARS C
+      JOIN TEAMS T ON T.TEAM_ID = C.TEAM_ID
+     WHERE C.TEAM_ID IS NOT NULL
+     ORDER BY C.CAR_ID DESC
+"""
+
+@st.cache_data(ttl=LAYER_TTL_S)
+def fetch_cars_df(include_unassigned: bool, version: int):
+    return run(_CARS_SQL_LEFT if include_unassigned else _CARS_SQL_INNER, fetch="all", dtypes=CARS_DTYPES)
+
+def session_memo(key: str, version_key: str, load):
+    """Значение из st.session_state, пока не сменилась общая версия и не истёк LAYER_TTL_S."""
+    ver = data_version(version_key)
+    hit = st.session_state.get(key)
+    now = time.monotonic()
+    if hit is None or hit[0] != ver or now - hit[1] > LAYER_TTL_S:
+        hit = (ver, now, load(ver))
+        st.session_state[key] = hit
+    return hit[2]
+
+def id_map(df, id_col: str, name_col: str, with_id: bool = False):
+    """{подпись: id} по двум колонкам без обхода строк."""
+    if df.empty:
+        return {}
+    ids = df[id_col].astype("int64")
+    labels = "[#" + ids.astype(str) + "] " + df[name_col] if with_id else df[name_col]
+    return dict(zip(labels.tolist(), ids.tolist()))
+
+def teams_state():
+    """(команды, {имя: id}, {"[#id] имя": id}) из одной выборки."""
+    def load(ver):
+        df = fetch_teams_df(ver)
+        return df, id_map(df, "TEAM_ID", "TEAM_NAME"), id_map(df, "TEAM_ID", "TEAM_NAME", with_id=True)
+    return session_memo("_teams", "teams_ver", load)
+
+def cars_state(include_unassigned=True):
+    """(машины, {"[#id] имя": id}) из одной выборки."""
+    def load(ver):
+        df = fetch_cars_df(include_unassigned, ver)
+        return df, id_map(df, "CAR_ID", "CAR_NAME", with_id=True)
+    return session_memo(f"_cars_{include_unassigned}", "cars_ver", load)
+
+def get_teams_df():
+    return teams_state()[0]
+
+def get_cars_df(include_unassigned=True):
+    return cars_state(include_unassigned)[0]
+
+def get_team_map(with_id: bool = False):
+    return teams_state()[2 if with_id else 1]
+
+def get_car_map():
+    return cars_state(True)[1]
+
+def get_race_results_df(race_uid: str):
+    return run(
+        """
+        SELECT RR.POSITION, T.TEAM_NAME, C.CAR_NAME, RR.AVG_SPEED_KMH, RR.FINISH_TIME_MIN, RR.PRIZE_USD
+          FROM RACE_RESULTS RR
+          JOIN CARS C  ON C.CAR_ID  = RR.CAR_ID
+          JOIN TEAMS T ON T.TEAM_ID = RR.TEAM_ID
+         WHERE RR.RACE_UID = ?
+         ORDER BY RR.POSITION
+        """,
+        [race_uid], fetch="all"
+    )
+
+HISTORY_PAGE_SIZE = 50
+
+def shift_history_page(step: int):
+    offset = st.session_state.get("history_offset", 0) + step * HISTORY_PAGE_SIZE
+    st.session_state["history_offset"] = max(0, offset)
+
+@st.cache_resource
+def get_eff_speed():
+    """Скомпилированный ufunc скорости; один объект на процесс, а не на каждый rerun."""
+    @vectorize(["float64(float64, float64, float64, float64, float64, float64, float64)"],
+               target="parallel", cache=True)
+    def eff_speed(top, accel, rel, hand, rnd, fail_u, pen_u):
+        accel_factor = min(1.2, max(0.8, 1.4 - 0.1 * accel))
+        handling_factor = 0.9 + hand / 1000.0
+        speed = 0.7 * top * accel_factor * handling_factor * (1.0 + 0.07 * rnd)
+        if fail_u > rel:
+            speed *= 0.7 + 0.2 * pen_u
+        return min(max(speed, 60.0), top)
+
+    return eff_speed
 
 # UI part
 st.title("🏁 Bootcamp Rally Racing Manager")
 st.caption("Snowflake + Python + Streamlit — manage cars & teams, then run a 100 km race!")
 
-init_schema_if_missing()
+if not st.session_state.get("_schema_ready"):
+    init_schema_if_missing()
+    st.session_state["_schema_ready"] = True
 
 tabs = st.tabs(["Teams", "Cars", "Assign", "Start race!", "History"])
 
@@ -146,25 +306,24 @@ with tabs[0]:
                 st.error("Team name is required.")
             else:
                 try:
-                    run("INSERT INTO TEAMS (TEAM_NAME, MEMBERS, BUDGET) VALUES (%s, %s, %s)",
+                    run("INSERT INTO TEAMS (TEAM_NAME, MEMBERS, BUDGET) VALUES (?, ?, ?)",
                         [team_name.strip(), members.strip(), budget])
+                    bump_version("teams_ver")
                     st.success(f"Team '{team_name}' added.")
                 except Exception as e:
                     st.error(f"Failed to add team: {e}")
     st.dataframe(get_teams_df(), use_container_width=True)
 
-    teams_df_now = get_teams_df()
-    if teams_df_now.empty:
+    team_map_del = get_team_map(with_id=True)
+    if not team_map_del:
         st.info("No teams yet.")
     else:
-        team_map_del = {f"[#{row['TEAM_ID']}] {row['TEAM_NAME']}": int(row["TEAM_ID"])
-                        for _, row in teams_df_now.iterrows()}
         sel_team_del = st.selectbox("Select a team to delete", list(team_map_del.keys()))
         if st.button("🗑️ Delete selected team"):
             team_id = team_map_del[sel_team_del]
-            has_cars = run("SELECT COUNT(*) AS CNT FROM CARS WHERE TEAM_ID = %s",
+            has_cars = run("SELECT COUNT(*) AS CNT FROM CARS WHERE TEAM_ID = ?",
                            [team_id], fetch="all")
-            has_results = run("SELECT COUNT(*) AS CNT FROM RACE_RESULTS WHERE TEAM_ID = %s",
+            has_results = run("SELECT COUNT(*) AS CNT FROM RACE_RESULTS WHERE TEAM_ID = ?",
                               [team_id], fetch="all")
             cnt_cars = int(has_cars.iloc[0]["CNT"]) if not has_cars.empty else 0
             cnt_res  = int(has_results.iloc[0]["CNT"]) if not has_results.empty else 0
@@ -175,7 +334,8 @@ with tabs[0]:
                 st.warning("Cannot delete: there are cars assigned to this team. Unassign or delete them first.")
             else:
                 try:
-                    run("DELETE FROM TEAMS WHERE TEAM_ID = %s", [team_id])
+                    run("DELETE FROM TEAMS WHERE TEAM_ID = ?", [team_id])
+                    bump_version("teams_ver")
                     st.success("Team deleted.")
                     st.rerun()
                 except Exception as e:
@@ -184,8 +344,7 @@ with tabs[0]:
 # CARS
 with tabs[1]:
     st.subheader("Manage Cars")
-    teams_df = get_teams_df()
-    team_options = {row["TEAM_NAME"]: int(row["TEAM_ID"]) for _, row in teams_df.iterrows()} if not teams_df.empty else {}
+    team_options = get_team_map()
 
     with st.form("add_car"):
         c_name = st.text_input("Car name", placeholder="Lightning X")
@@ -200,31 +359,31 @@ with tabs[1]:
                 team_id = None if chosen_team == "— Unassigned —" else team_options[chosen_team]
                 run(
                     "INSERT INTO CARS (CAR_NAME, TOP_SPEED_KMH, ACCEL_0_100_S, RELIABILITY, HANDLING, WEIGHT_KG, TEAM_ID)"
-                    " VALUES (%s, %s, %s, %s, %s, %s, %s)",
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)",
                     [c_name.strip(), c_top, c_acc, c_rel, c_hand, c_weight, team_id]
                 )
+                bump_version("cars_ver")
                 st.success(f"Car '{c_name}' added.")
             except Exception as e:
                 st.error(f"Failed to add car: {e}")
     st.dataframe(get_cars_df(True), use_container_width=True)
 
-    cars_df_now = get_cars_df(True)
-    if cars_df_now.empty:
+    car_map_del = get_car_map()
+    if not car_map_del:
         st.info("No cars yet.")
     else:
-        car_map_del = {f"[#{row['CAR_ID']}] {row['CAR_NAME']}": int(row["CAR_ID"])
-                       for _, row in cars_df_now.iterrows()}
         sel_car_del = st.selectbox("Select a car to delete", list(car_map_del.keys()))
         if st.button("🗑️ Delete selected car"):
             car_id = car_map_del[sel_car_del]
-            used = run("SELECT COUNT(*) AS CNT FROM RACE_RESULTS WHERE CAR_ID = %s",
+            used = run("SELECT COUNT(*) AS CNT FROM RACE_RESULTS WHERE CAR_ID = ?",
                        [car_id], fetch="all")
             cnt = int(used.iloc[0]["CNT"]) if not used.empty else 0
             if cnt > 0:
                 st.warning("Cannot delete: this car appears in race results.")
             else:
                 try:
-                    run("DELETE FROM CARS WHERE CAR_ID = %s", [car_id])
+                    run("DELETE FROM CARS WHERE CAR_ID = ?", [car_id])
+                    bump_version("cars_ver")
                     st.success("Car deleted.")
                     st.rerun()
                 except Exception as e:
@@ -233,19 +392,18 @@ with tabs[1]:
 
 with tabs[2]:
     st.subheader("Assign Car to Team")
-    cars_df = get_cars_df(True)
-    teams_df = get_teams_df()
+    car_map = get_car_map()
+    team_map = get_team_map()
 
-    if cars_df.empty or teams_df.empty:
+    if not car_map or not team_map:
         st.info("Add at least one car and one team first.")
     else:
-        car_map = {f"[#{row['CAR_ID']}] {row['CAR_NAME']}": int(row["CAR_ID"]) for _, row in cars_df.iterrows()}
-        team_map = {row["TEAM_NAME"]: int(row["TEAM_ID"]) for _, row in teams_df.iterrows()}
         sel_car = st.selectbox("Car", list(car_map.keys()))
         sel_team = st.selectbox("Team", list(team_map.keys()))
         if st.button("🔗 Assign"):
             try:
-                run("UPDATE CARS SET TEAM_ID = %s WHERE CAR_ID = %s", [team_map[sel_team], car_map[sel_car]])
+                run("UPDATE CARS SET TEAM_ID = ? WHERE CAR_ID = ?", [team_map[sel_team], car_map[sel_car]])
+                bump_version("cars_ver")
                 st.success("Assignment updated.")
             except Exception as e:
                 st.error(f"Failed to assign: {e}")
@@ -264,108 +422,100 @@ with tabs[3]:
     if st.button("🏁 Start race!"):
         cars = run(
             """
-            SELECT C.CAR_ID, C.CAR_NAME, C.TOP_SPEED_KMH, C.ACCEL_0_100_S, C.RELIABILITY,
-                   C.HANDLING, C.WEIGHT_KG, T.TEAM_ID, T.TEAM_NAME
+            SELECT C.CAR_ID, C.TOP_SPEED_KMH, C.ACCEL_0_100_S, C.RELIABILITY, C.HANDLING, T.TEAM_ID
               FROM CARS C
               JOIN TEAMS T ON T.TEAM_ID = C.TEAM_ID
+             WHERE C.TEAM_ID IS NOT NULL
             """,
-            fetch="all"
+            fetch="all", dtypes={**CAR_SPEC_DTYPES, "TEAM_ID": "int64"}
         )
         if cars.empty:
             st.error("No cars assigned to teams.")
         else:
             race_uid = str(uuid.uuid4())
-            results = []
-            for _, row in cars.iterrows():
-                top = float(row["TOP_SPEED_KMH"])
-                accel = float(row["ACCEL_0_100_S"])
-                rel = float(row["RELIABILITY"])
-                hand = float(row["HANDLING"])
-
-                accel_factor = max(0.8, min(1.2, 1.4 - 0.1 * accel)) 
-                handling_factor = 0.9 + (hand / 1000.0)              
-                randomness = np.random.normal(1.0, 0.07)  
-
-                effective_speed = 0.7 * top * accel_factor * handling_factor * randomness
-                if np.random.rand() > rel:                          
-                    effective_speed *= np.random.uniform(0.7, 0.9)
-
-                effective_speed = max(60.0, min(effective_speed, top))
-                time_min = (float(distance) / effective_speed) * 60.0
-                results.append({
-                    "CAR_ID": int(row["CAR_ID"]),
-                    "CAR_NAME": row["CAR_NAME"],
-                    "TEAM_ID": int(row["TEAM_ID"]),
-                    "TEAM_NAME": row["TEAM_NAME"],
-                    "AVG_SPEED_KMH": round(effective_speed, 2),
-                    "FINISH_TIME_MIN": round(time_min, 3),
-                })
-
-            results.sort(key=lambda x: x["FINISH_TIME_MIN"])
-            for i, r in enumerate(results, start=1):
-                r["POSITION"] = i
-
+            top = cars["TOP_SPEED_KMH"].to_numpy()
+            accel = cars["ACCEL_0_100_S"].to_numpy()
+            rel = cars["RELIABILITY"].to_numpy()
+            hand = cars["HANDLING"].to_numpy()
+
+            n = top.shape[0]
+            rng = np.random.default_rng()
+            u = rng.random((n, 2))
+            z = rng.standard_normal(n)
+
+            eff = get_eff_speed()(top, accel, rel, hand, z, u[:, 0], u[:, 1])
+            time_min = (float(distance) / eff) * 60.0
+
+            res_df = cars[["CAR_ID", "TEAM_ID"]].assign(
+                FINISH_TIME_MIN=time_min.round(3), AVG_SPEED_KMH=eff.round(2)
+            )
             prizes = [round(prize_pool * p, 2) for p in prize_split]
-            for r in results:
-                r["PRIZE_USD"] = prizes[r["POSITION"] - 1] if r["POSITION"] <= len(prizes) else 0.0
+            prize_case = " ".join(f"WHEN {i} THEN ?" for i in range(1, len(prizes) + 1))
+            rows_sql = ", ".join(["(?, ?, ?, ?)"] * len(res_df))
+
+            params = [race_uid, track, distance, fee, prize_pool]
+            params += [race_uid, *prizes]
+            params += [v for row in res_df.itertuples(index=False, name=None) for v in row]
+            params += [fee, race_uid]
 
             try:
-                run("BEGIN")
                 run(
-                    "INSERT INTO RACES (RACE_UID, TRACK_NAME, DISTANCE_KM, FEE_USD, PRIZE_POOL_USD) VALUES (%s, %s, %s, %s, %s)",
-                    [race_uid, track, distance, fee, prize_pool]
+                    "BEGIN;"
+                    " INSERT INTO RACES (RACE_UID, TRACK_NAME, DISTANCE_KM, FEE_USD, PRIZE_POOL_USD)"
+                    " VALUES (?, ?, ?, ?, ?);"
+                    " INSERT INTO RACE_RESULTS (RACE_UID, CAR_ID, TEAM_ID, FINISH_TIME_MIN, AVG_SPEED_KMH, POSITION, PRIZE_USD)"
+                    " SELECT ?, R.CAR_ID, R.TEAM_ID, R.FINISH_TIME_MIN, R.AVG_SPEED_KMH, R.POS,"
+                    f" CASE R.POS {prize_case} ELSE 0 END"
+                    " FROM (SELECT V.*, ROW_NUMBER() OVER (ORDER BY V.FINISH_TIME_MIN, V.CAR_ID) AS POS"
+                    f" FROM (VALUES {rows_sql}) AS V (CAR_ID, TEAM_ID, FINISH_TIME_MIN, AVG_SPEED_KMH)) R;"
+                    " UPDATE TEAMS T SET BUDGET = T.BUDGET + D.DELTA"
+                    " FROM (SELECT TEAM_ID, SUM(PRIZE_USD) - COUNT(*) * ? AS DELTA"
+                    " FROM RACE_RESULTS WHERE RACE_UID = ? GROUP BY TEAM_ID) D"
+                    " WHERE T.TEAM_ID = D.TEAM_ID;"
+                    " COMMIT;",
+                    params, num_statements=5
                 )
-                for r in results:
-                    run(
-                        "INSERT INTO RACE_RESULTS (RACE_UID, CAR_ID, TEAM_ID, FINISH_TIME_MIN, AVG_SPEED_KMH, POSITION, PRIZE_USD)"
-                        " VALUES (%s, %s, %s, %s, %s, %s, %s)",
-                        [race_uid, r["CAR_ID"], r["TEAM_ID"], r["FINISH_TIME_MIN"], r["AVG_SPEED_KMH"], r["POSITION"], r["PRIZE_USD"]]
-                    )
-
-                df = pd.DataFrame(results)
-                fees = df.groupby("TEAM_ID")["CAR_ID"].count().rename("entries").reset_index()
-                fees["fee_total"] = fees["entries"] * fee
-                prizes_team = df.groupby("TEAM_ID")["PRIZE_USD"].sum().reset_index()
-
-                merged = pd.merge(fees, prizes_team, on="TEAM_ID", how="left").fillna({"PRIZE_USD": 0.0})
-                for _, row in merged.iterrows():
-                    delta = float(row["PRIZE_USD"] - row["fee_total"])
-                    run("UPDATE TEAMS SET BUDGET = BUDGET + %s WHERE TEAM_ID = %s", [delta, int(row["TEAM_ID"])])
-
-                run("COMMIT")
+                bump_version("teams_ver")
             except Exception as e:
                 run("ROLLBACK")
                 st.error(f"Failed to persist race: {e}")
             else:
                 st.success(f"Race completed: {track} ({distance} km). RACE_UID: {race_uid}")
                 st.write("### Results")
-                res_df = pd.DataFrame(results)[["POSITION", "TEAM_NAME", "CAR_NAME", "AVG_SPEED_KMH", "FINISH_TIME_MIN", "PRIZE_USD"]]
-                st.dataframe(res_df, use_container_width=True)
+                st.dataframe(get_race_results_df(race_uid), use_container_width=True)
 
                 st.write("### Updated Team Budgets")
                 st.dataframe(get_teams_df(), use_container_width=True)
 
 with tabs[4]:
     st.subheader("Race History")
-    races = run(
-        "SELECT RACE_UID, TRACK_NAME, DISTANCE_KM, FEE_USD, PRIZE_POOL_USD, CREATED_AT FROM RACES ORDER BY CREATED_AT DESC",
-        fetch="all"
-    )
-    st.dataframe(races, use_container_width=True)
+    offset = st.session_state.get("history_offset", 0)
+    races_slot = st.empty()
+    frames = []
+    for batch in run_batches(
+        "SELECT RACE_UID, TRACK_NAME, CREATED_AT FROM RACES ORDER BY CREATED_AT DESC LIMIT ? OFFSET ?",
+        [HISTORY_PAGE_SIZE + 1, offset]
+    ):
+        frames.append(batch)
+        races_slot.dataframe(pd.concat(frames, ignore_index=True).head(HISTORY_PAGE_SIZE), use_container_width=True)
+    races = (pd.concat(frames, ignore_index=True) if frames
+             else pd.DataFrame(columns=["RACE_UID", "TRACK_NAME", "CREATED_AT"]))
+    has_older = len(races) > HISTORY_PAGE_SIZE
+    races = races.head(HISTORY_PAGE_SIZE)
+    if not frames:
+        races_slot.dataframe(races, use_container_width=True)
+
+    col_newer, col_older = st.columns(2)
+    col_newer.button("◀ Newer races", on_click=shift_history_page, args=(-1,), disabled=offset == 0)
+    col_older.button("Older races ▶", on_click=shift_history_page, args=(1,), disabled=not has_older)
 
     sel = st.selectbox("Show results for RACE_UID", races["RACE_UID"].tolist() if not races.empty else [])
     if sel:
-        rr = run(
-            """
-            SELECT RR.POSITION, T.TEAM_NAME, C.CAR_NAME, RR.AVG_SPEED_KMH, RR.FINISH_TIME_MIN, RR.PRIZE_USD
-              FROM RACE_RESULTS RR
-              JOIN CARS C  ON C.CAR_ID  = RR.CAR_ID
-              JOIN TEAMS T ON T.TEAM_ID = RR.TEAM_ID
-             WHERE RR.RACE_UID = %s
-             ORDER BY RR.POSITION
-            """,
+        race_info = run(
+            "SELECT DISTANCE_KM, FEE_USD, PRIZE_POOL_USD FROM RACES WHERE RACE_UID = ?",
             [sel], fetch="all"
         )
-        st.dataframe(rr, use_container_width=True)
+        st.dataframe(race_info, use_container_width=True, hide_index=True)
+        st.dataframe(get_race_results_df(sel), use_container_width=True)
 
 st.caption("Add cars via UI; only cars with a team will race.")